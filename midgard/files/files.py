@@ -27,7 +27,7 @@ def open(
         file_path:     String or pathlib.Path representing the full file path.
         create_dirs:   True or False, if True missing directories are created.
         open_as_gzip:  Use gzip library to open file.
-        open_args:     All keyword arguments are passed on to the built-in open.
+        open_args:     All keyword arguments are passed on to the built-in open (buffering is ignored for gzip).
 
     Returns:
         File object representing the file.
@@ -42,6 +42,8 @@ def open(
         open_as_gzip = file_path.suffix == ".gz"
 
     open_func = gzip.open if open_as_gzip else builtins.open
+    if open_as_gzip:
+        open_args.pop("buffering", None)  # Not supported by gzip.open
 
     try:
         with open_func(file_path, **open_args) as fid:
@@ -25,8 +25,12 @@ The name used in `parse_file` to call the parser is the name of the module
 """
 
 # Standard library imports
+import collections
+from concurrent import futures
+import functools
+import os
 import pathlib
-from typing import Any, Callable, List, Optional, Union
+from typing import Any, Callable, Deque, Iterable, Iterator, List, Optional, Union
 
 # Midgard imports
 from midgard.dev import plugins
@@ -84,6 +88,87 @@ def parse_file(
     return parser
 
 
+def parse_files(
+    parser_name: str,
+    file_paths: Iterable[Union[str, pathlib.Path]],
+    encoding: Optional[str] = None,
+    timer_logger: Optional[Callable[[str], None]] = None,
+    prefetch: int = 16,
+    workers: Optional[int] = 1,
+    **parser_args: Any,
+) -> Iterator[Parser]:
+    """Use the given parser on several files and yield the parsed data
+
+    The files are parsed one at a time in the given order, see `parse_file` for details. While a file is parsed, the
+    operating system is asked to read the next `prefetch` files into memory in the background, so that reading and
+    parsing overlap when a batch of files is parsed. Prefetching is only done on platforms supporting
+    `os.posix_fadvise`, and has no effect for files that are already cached.
+
+    With `workers` different from 1, the files are instead parsed in parallel by a pool of processes, which scales
+    with the number of cores since parsing is typically CPU-bound. The parsers are still returned in the given order.
+    At most two files per process are parsed ahead of the caller, so that a slow caller does not keep all parsed
+    files in memory. All parser arguments, including `timer_logger`, must then be picklable.
+
+    Example:
+
+        >>> for parser in parse_files('terrapos_position', ['a.txt', 'b.txt']):  # doctest: +SKIP
+        ...     dset = parser.as_dataset()
+
+    Args:
+        parser_name:    Name of parser
+        file_paths:     Paths to files that should be parsed.
+        encoding:       Encoding in files that are parsed.
+        timer_logger:   Logging function that will be used to log timing information.
+        prefetch:       Number of files that are read ahead in the background.
+        workers:        Number of processes used for parsing, None means one process per CPU.
+        parser_args:    Input arguments to the parser
+
+    Returns:
+        Iterator of parsers with the parsed data, one for each file
+    """
+    file_paths = [pathlib.Path(file_path) for file_path in file_paths]
+    if workers != 1:
+        parse = functools.partial(parse_file, parser_name, encoding=encoding, timer_logger=timer_logger, **parser_args)
+        max_pending = 2 * (workers or os.cpu_count() or 1)
+        pending: Deque[futures.Future] = collections.deque()
+        with futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            for file_path in file_paths:
+                pending.append(executor.submit(parse, file_path))
+                if len(pending) >= max_pending:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        return
+
+    for file_path in file_paths[:prefetch]:
+        _prefetch(file_path)
+
+    for idx, file_path in enumerate(file_paths):
+        if idx + prefetch < len(file_paths):
+            _prefetch(file_paths[idx + prefetch])
+        yield parse_file(parser_name, file_path, encoding=encoding, timer_logger=timer_logger, **parser_args)
+
+
+def _prefetch(file_path: pathlib.Path) -> None:
+    """Ask the operating system to start reading a file into memory in the background
+
+    Args:
+        file_path:  Path to file that should be read.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+
+    try:
+        fd = os.open(file_path, os.O_RDONLY)
+    except OSError:
+        return  # Missing files are handled by the parser
+
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+
+
 def names() -> List[str]:
     """List the names of the available parsers
 
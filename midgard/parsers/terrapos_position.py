@@ -14,7 +14,11 @@ Reads data from files in Terrapos position output format.
 
 """
 # Standard library imports
-from typing import Any, Dict, Tuple, Union
+import io
+import itertools
+import mmap
+import os
+from typing import Any, Callable, Dict, List, Tuple, Union
 
 # Third party imports
 import numpy as np
@@ -22,10 +26,45 @@ import numpy as np
 # Midgard imports
 from midgard.data import dataset
 from midgard.data.time import Time
+from midgard.dev import log
 from midgard.dev import plugins
+from midgard.files import files
 from midgard.math.unit import Unit
 from midgard.parsers import LineParser
 
+# Buffer size in bytes used for reading files, large compared to the default of 8 KiB to reduce the number of reads
+_READ_BUFFER_SIZE = 2 ** 20
+
+# Conversion factor from degrees to radians, looked up once since Unit-conversions are parsed by pint on each access
+_DEG2RAD = float(Unit.deg2rad)
+
+
+def _to_float_or_nan(value: bytes) -> float:
+    """Convert a byte string to float, where empty or invalid values are read as NaN"""
+    try:
+        return float(value)
+    except ValueError:
+        return np.nan
+
+
+def _make_line_parser(colspecs: Tuple[Tuple[int, int], ...]) -> Callable[[List[bytes]], List[Tuple[float, ...]]]:
+    """Generate a function converting fixed-width data lines to tuples of floats
+
+    The start and end of each column are written into the source code of the function as constants, so that each line
+    is split and converted in one expression without looping over the columns.
+
+    Args:
+        colspecs:  Start and end of each column.
+
+    Returns:
+        Function taking a list of data lines and returning one tuple of floats per line.
+    """
+    values = ", ".join(f"_to_float_or_nan(line[{start}:{end}])" for start, end in colspecs)
+    source = f"def parse_lines(lines):\n    return [({values},) for line in lines]\n"
+    namespace = dict(_to_float_or_nan=_to_float_or_nan)
+    exec(compile(source, f"<line parser {colspecs}>", "exec"), namespace)
+    return namespace["parse_lines"]
+
 
 @plugins.register
 class TerraposPositionParser(LineParser):
@@ -60,65 +99,209 @@ class TerraposPositionParser(LineParser):
     | \__parser_name__     | Parser name                                                                          |
     """
     
+    # Column layout of Terrapos position output file
+    #
+    # # Week       ToW (s)      Lat (deg)       Lon (deg)   Hght (m)    Roll(d)   Pitch(d)    Head(d)  sN (m)  sE (m)  sH (m)  sR (m)  sP (m) sHd (m)  #S    PDOP    rN (m)    rE (m)    rH (m)
+    # ----+----1----+----2----+----3----+----4----+----5----+----6----+----7----+----8----+----9----+----0----+----1----+----2----+----3----+----4----+----5----+----6----+----7----+----8----+-
+    #  1972  518430.000000   70.083249333    29.735357183    56.7994                                    5.300   5.895  10.821                           6     3.5   151.851   373.061   321.308
+    #  1972  518460.000000   70.083251198    29.735329955    56.2342                                    5.303   5.925  10.778                           6     3.5   149.417   369.513   316.813
+    _names = (
+        "gpsweek",
+        "gpssec",
+        "lat",
+        "lon",
+        "height",
+        "roll",
+        "pitch",
+        "head",
+        "sigma_north",
+        "sigma_east",
+        "sigma_height",
+        "sigma_roll",
+        "sigma_pitch",
+        "sigma_head",
+        "num_sat",
+        "pdop",
+        "reliability_north",
+        "reliability_east",
+        "reliability_height",
+    )
+    _widths = (5, 15, 15, 16, 11, 11, 11, 11, 8, 8, 8, 8, 8, 8, 4, 8, 10, 10, 10)
+
+    # Start and end of each column, and the corresponding byte string fields of a data line including end of line
+    _colspecs = tuple(zip((0, *itertools.accumulate(_widths)), itertools.accumulate(_widths)))
+    _line_length = _colspecs[-1][1]
+    _line_dtype = np.dtype(
+        dict(
+            names=[*_names, "eol"],
+            formats=[*[f"S{width}" for width in _widths], "S1"],
+            offsets=[*[start for start, _ in _colspecs], _line_length],
+            itemsize=_line_length + 1,
+        )
+    )
+    _parse_lines = staticmethod(_make_line_parser(_colspecs))
+
     def __init__(
         self,
         *args: Tuple[Any],
         station: Union[None, str] = None,
+        drop_empty_fields: bool = False,
         **kwargs: Dict[Any, Any],
     ) -> None:
-        """Initialize Rinex3-parser
+        """Initialize Terrapos position parser
         
         Args:
-            args:           Parameters without keyword.
-            station:        Station name.
-            kwargs:         Keyword arguments.
+            args:               Parameters without keyword.
+            station:            Station name.
+            drop_empty_fields:  Do not add float fields without any values (only NaN) to the dataset.
+            kwargs:             Keyword arguments.
         """
         super().__init__(*args, **kwargs)
         self.station = station
+        self.drop_empty_fields = drop_empty_fields
 
 
     def setup_parser(self) -> Dict[str, Any]:
         """Set up information needed for the parser
 
-        This should return a dictionary with all parameters needed by np.genfromtxt to do the actual parsing.
+        The dictionary describes the file format and is stored in meta["__params__"]. Only the comment marker is used
+        by read_data, to skip header and comment lines. The names and widths of the columns are given for reference,
+        as the column layout is fixed in the class attributes.
 
         Returns:
-            Dict:  Parameters needed by np.genfromtxt to parse the input file.
+            Dict:  Comment marker, and names and widths of the columns in the input file.
         """
-
-        # Parser for Terrapos position output file
-
-        # # Week       ToW (s)      Lat (deg)       Lon (deg)   Hght (m)    Roll(d)   Pitch(d)    Head(d)  sN (m)  sE (m)  sH (m)  sR (m)  sP (m) sHd (m)  #S    PDOP    rN (m)    rE (m)    rH (m)
-        # ----+----1----+----2----+----3----+----4----+----5----+----6----+----7----+----8----+----9----+----0----+----1----+----2----+----3----+----4----+----5----+----6----+----7----+----8----+-
-        #  1972  518430.000000   70.083249333    29.735357183    56.7994                                    5.300   5.895  10.821                           6     3.5   151.851   373.061   321.308
-        #  1972  518460.000000   70.083251198    29.735329955    56.2342                                    5.303   5.925  10.778                           6     3.5   149.417   369.513   316.813
         return dict(
             comments="#",  # Remove comment lines starting with '#'
-            names=(
-                "gpsweek",
-                "gpssec",
-                "lat",
-                "lon",
-                "height",
-                "roll",
-                "pitch",
-                "head",
-                "sigma_north",
-                "sigma_east",
-                "sigma_height",
-                "sigma_roll",
-                "sigma_pitch",
-                "sigma_head",
-                "num_sat",
-                "pdop",
-                "reliability_north",
-                "reliability_east",
-                "reliability_height",
-            ),
-            delimiter=(5, 15, 15, 16, 11, 11, 11, 11, 8, 8, 8, 8, 8, 8, 4, 8, 10, 10, 10),
+            names=self._names,
+            delimiter=self._widths,
         )
-        
-        
+
+    def read_data(self) -> None:
+        """Read data from the data file
+
+        Terrapos position files are fixed-width and contain only numeric columns. The data lines are viewed as a
+        structured array with a byte string field at the offset of each column, and the fields are converted to float
+        directly by numpy, see `_to_array`.
+
+        Usually the data lines follow the header directly and have the same length. Then the file is memory mapped,
+        and the number of data lines is given by the file size, so no lines are copied. Otherwise, or if the file can
+        not be memory mapped, the data lines are read one by one and padded to the full length. If a field can not be
+        converted, the data lines are parsed one by one by a function generated for the column layout at class
+        definition, where invalid values are read as NaN.
+        """
+        self.meta["__params__"] = self.setup_parser()
+        comments = self.meta["__params__"]["comments"].encode()
+        line_length = self._line_length
+        self._array = None
+
+        with files.open(self.file_path, mode="rb", buffering=_READ_BUFFER_SIZE) as fid:
+            # Gzipped files can not be memory mapped
+            if isinstance(fid, io.BufferedReader) and os.fstat(fid.fileno()).st_size > 0:
+                try:
+                    buffer = mmap.mmap(fid.fileno(), 0, access=mmap.ACCESS_READ)
+                except (OSError, ValueError) as err:
+                    log.debug(f"Reading {self.file_path} line by line, memory mapping failed: {err}")
+                else:
+                    with buffer:
+                        self._array = self._read_mapped(buffer, comments)
+
+            if self._array is None:
+                fid.seek(0)
+                lines = [
+                    line.rstrip(b"\r\n")[:line_length].ljust(line_length) + b"\n"
+                    for line in fid
+                    if line.strip() and not line.startswith(comments)
+                ]
+
+        if self._array is None:
+            try:
+                self._array = self._to_array(np.frombuffer(b"".join(lines), dtype=self._line_dtype))
+            except ValueError as err:
+                log.debug(f"Parsing {self.file_path} line by line, fixed-width parsing failed: {err}")
+                rows = self._parse_lines(lines)
+                self._array = np.ascontiguousarray(np.array(rows, dtype=float).reshape(-1, len(self._names)).T)
+
+        if self._array.size == 0:
+            log.warn(f"Empty input file {self.file_path}. No data available.")
+            self.data_available = False
+
+        self.structure_data()
+
+    def _read_mapped(self, buffer: mmap.mmap, comments: bytes) -> Union[None, np.ndarray]:
+        """Read data lines directly from a memory mapped file
+
+        The data lines are only read if they follow the header lines directly, and all have the full line length.
+
+        Args:
+            buffer:    Memory mapped file.
+            comments:  Start of header lines.
+
+        Returns:
+            Data with one row per column, or None if the data lines can not be read directly.
+        """
+        data_start = 0
+        while buffer[data_start : data_start + 1] == comments:
+            data_start = buffer.find(b"\n", data_start) + 1
+            if data_start == 0:
+                return None
+
+        num_obs, remainder = divmod(len(buffer) - data_start, self._line_dtype.itemsize)
+        if num_obs == 0 or remainder != 0:
+            return None
+
+        # The view of the memory map has to be removed before the memory map is closed
+        fields = np.frombuffer(buffer, dtype=self._line_dtype, count=num_obs, offset=data_start)
+        try:
+            if not (fields["eol"] == b"\n").all():
+                return None
+            return self._to_array(fields)
+        except ValueError:
+            return None
+        finally:
+            del fields
+
+    def structure_data(self) -> None:
+        """Structure raw array data into the self.data dictionary
+
+        The raw array has one row per column in the file, so that the data of each field are stored contiguously.
+        """
+        self.data.update(zip(self._names, self._array))
+
+    def _to_array(self, fields: np.ndarray) -> np.ndarray:
+        """Convert byte string fields of data lines to float
+
+        The values are stored column by column in one float array, so that each field is contiguous in memory.
+
+        Args:
+            fields:  Structured array with byte string fields of data lines.
+
+        Returns:
+            Float data with one row per column.
+        """
+        data = np.empty((len(self._names), len(fields)))
+        for name, values in zip(self._names, data):
+            self._to_float(fields[name], out=values)
+        return data
+
+    @staticmethod
+    def _to_float(field: np.ndarray, out: np.ndarray) -> None:
+        """Convert a fixed-width byte string field to float, where empty values are read as NaN
+
+        Args:
+            field:  Byte strings of one column.
+            out:    Array the float values of the column are stored in.
+        """
+        empty = field == b" " * field.itemsize
+        if not empty.any():
+            np.copyto(out, field, casting="unsafe")
+            return
+
+        out[:] = np.nan
+        if not empty.all():
+            filled = ~empty
+            out[filled] = field[filled].astype(np.float64)
+
     #
     # WRITE DATA
     #
@@ -144,19 +327,26 @@ class TerraposPositionParser(LineParser):
        | sigma_north        | numpy.ndarray     | Standard deviation of North position in [m] #TODO: Is that correct? |
        | site_pos           | Position          | x, y and z station coordinates                                      |
        | time               | Time              | Parameter time given as TimeTable object                            |
-        
+
+            If `drop_empty_fields` is set, float fields with only NaN values are not added to the dataset. Their names
+            are listed in the meta-data entry `empty_fields` instead.
         """
         dset = dataset.Dataset(num_obs=len(self.data["gpsweek"]))
         dset.meta.update(self.meta)
 
-        # Define and add float fields
-        float_fields = list()
-        for key in self.data.keys():
-            if key not in ["gpsweek", "gpssec"]:
-                float_fields.append(key)
-        
-        for field in float_fields:        
-            dset.add_float(field, val=self.data[field])
+        # Add float fields. The columns are float64 views into one array of parsed data, which are stored by
+        # add_float without copying. Fields without any values are skipped if drop_empty_fields is set.
+        empty_fields = list()
+        for field, val in self.data.items():
+            if field in ("gpsweek", "gpssec"):
+                continue
+            if self.drop_empty_fields and np.isnan(val).all():
+                empty_fields.append(field)
+                continue
+            dset.add_float(field, val=val)
+
+        if self.drop_empty_fields:
+            dset.meta["empty_fields"] = empty_fields
 
         # Add time field
         dset.add_time(
@@ -170,20 +360,14 @@ class TerraposPositionParser(LineParser):
         )
         
         # Add position field
-        dset.add_position(
-            "site_pos",
-            time=dset.time,
-            system="llh",
-            val=np.stack((
-                    self.data["lat"] * Unit.deg2rad,
-                    self.data["lon"] * Unit.deg2rad, 
-                    self.data["height"]), 
-                    axis=1,
-            )
-        )
+        llh = np.empty((dset.num_obs, 3))
+        np.multiply(self.data["lat"], _DEG2RAD, out=llh[:, 0])
+        np.multiply(self.data["lon"], _DEG2RAD, out=llh[:, 1])
+        llh[:, 2] = self.data["height"]
+        dset.add_position("site_pos", time=dset.time, system="llh", val=llh)
         
-        # Add text field
+        # Add text field. The station names are created directly as fixed-length strings in one array.
         if self.station:
-            dset.add_text("station", val=np.repeat(self.station, dset.num_obs)[:, None])
+            dset.add_text("station", val=np.full((dset.num_obs, 1), self.station, dtype=f"U{len(self.station)}"))
         
         return dset
@@ -29,114 +29,109 @@ def posveldelta(request):
     return request.getfixturevalue(request.param.__name__)
 
 
-@pytest.fixture
+# Each fixture has its own fixed seed, so that the values do not depend on which tests are run or in which order
+@pytest.fixture(scope="module")
 def pos_trs_a():
     """"""
-    return position.Position(np.random.random((5, 3)) * 6.3e6, system="trs")
+    rng = np.random.default_rng(1)
+    return position.Position(rng.random((5, 3)) * 6.3e6, system="trs")
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def pos_trs_s():
     """"""
-    return position.Position(np.random.random((3,)) * 6.3e6, system="trs")
+    rng = np.random.default_rng(2)
+    return position.Position(rng.random((3,)) * 6.3e6, system="trs")
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def posvel_trs_a():
     """"""
+    rng = np.random.default_rng(3)
     factor = np.array([2e8] * 3 + [1e3] * 3)
-    return position.PosVel(np.random.random((5, 6)) * factor, system="trs")
+    return position.PosVel(rng.random((5, 6)) * factor, system="trs")
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def posvel_trs_s():
     """"""
+    rng = np.random.default_rng(4)
     factor = np.array([2e8] * 3 + [1e3] * 3)
-    return position.PosVel(np.random.random((6,)) * factor, system="trs")
+    return position.PosVel(rng.random((6,)) * factor, system="trs")
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def posveldelta_trs_a():
     """"""
-    ref_pos = position.PosVel(np.random.random((5, 6)) * 6.3e6, system="trs")
-    return position.PosVelDelta(np.random.random((5, 6)), system="trs", ref_pos=ref_pos)
+    rng = np.random.default_rng(5)
+    ref_pos = position.PosVel(rng.random((5, 6)) * 6.3e6, system="trs")
+    return position.PosVelDelta(rng.random((5, 6)), system="trs", ref_pos=ref_pos)
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def posveldelta_trs_s():
     """"""
-    ref_pos = position.PosVel(np.random.random((6,)) * 6.3e6, system="trs")
-    return position.PosVelDelta(np.random.random((6,)), system="trs", ref_pos=ref_pos)
+    rng = np.random.default_rng(6)
+    ref_pos = position.PosVel(rng.random((6,)) * 6.3e6, system="trs")
+    return position.PosVelDelta(rng.random((6,)), system="trs", ref_pos=ref_pos)
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def posdelta_trs_a():
     """"""
-    ref_pos = position.Position(np.random.random((5, 3)) * 6.3e6, system="trs")
-    return position.PositionDelta(np.random.random((5, 3)), system="trs", ref_pos=ref_pos)
+    rng = np.random.default_rng(7)
+    ref_pos = position.Position(rng.random((5, 3)) * 6.3e6, system="trs")
+    return position.PositionDelta(rng.random((5, 3)), system="trs", ref_pos=ref_pos)
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def posdelta_trs_s():
     """"""
-    ref_pos = position.Position(np.random.random((3,)) * 6.3e6, system="trs")
-    return position.PositionDelta(np.random.random((3,)), system="trs", ref_pos=ref_pos)
+    rng = np.random.default_rng(8)
+    ref_pos = position.Position(rng.random((3,)) * 6.3e6, system="trs")
+    return position.PositionDelta(rng.random((3,)), system="trs", ref_pos=ref_pos)
 
 
-@pytest.mark.parametrize("pos", (pos_trs_a, pos_trs_s), indirect=True)
-def test_pos_conversions(pos):
-    systems = position.PositionArray.systems.keys()
+def assert_conversions(pos, systems):
+    """Assert that converting to each system and back to the original system gives the original values
 
+    All conversions are compared with the original values at once.
+    """
     print(f"Testing systems {systems}")
+    converted = list()
+    converted_systems = list()
     for system in systems:
         try:
-            converted_pos = getattr(getattr(pos, system), pos.system)
-            assert np.allclose(np.asarray(pos), np.asarray(converted_pos))
-            print(f"pos.{system} == pos.{system}.{pos.system} OK")
+            converted.append(np.asarray(getattr(getattr(pos, system), pos.system)))
+            converted_systems.append(system)
         except exceptions.UnknownConversionError:
             print(f"Conversion from {pos.system} to {system} is not defined")
 
+    converted = np.stack(converted)
+    assert np.allclose(converted, np.broadcast_to(np.asarray(pos), converted.shape)), (
+        f"Converting {pos.system} to one of {converted_systems} and back does not give the original values"
+    )
+    print(f"Converting {pos.system} to {converted_systems} and back OK")
+
+
+@pytest.mark.parametrize("pos", (pos_trs_a, pos_trs_s), indirect=True)
+def test_pos_conversions(pos):
+    assert_conversions(pos, position.PositionArray.systems.keys())
+
 
 @pytest.mark.parametrize("posdelta", (posdelta_trs_a, posdelta_trs_s), indirect=True)
 def test_posdelta_conversions(posdelta):
-    systems = position.PositionDeltaArray.systems.keys()
-
-    print(f"Testing systems {systems}")
-    for system in systems:
-        try:
-            converted_pos = getattr(getattr(posdelta, system), posdelta.system)
-            assert np.allclose(np.asarray(posdelta), np.asarray(converted_pos))
-            print(f"posdelta.{system} == posdelta.{system}.{posdelta.system} OK")
-        except exceptions.UnknownConversionError:
-            print(f"Conversion from {posdelta.system} to {system} is not defined")
+    assert_conversions(posdelta, position.PositionDeltaArray.systems.keys())
 
 
 @pytest.mark.parametrize("posvel", (posvel_trs_a, posvel_trs_s), indirect=True)
 def test_posvel_conversions(posvel):
-    systems = position.PosVelArray.systems.keys()
-
-    print(f"Testing systems {systems}")
-    for system in systems:
-        try:
-            converted_pos = getattr(getattr(posvel, system), posvel.system)
-            assert np.allclose(np.asarray(posvel), np.asarray(converted_pos))
-            print(f"posvel.{system} == posvel.{system}.{posvel.system} OK")
-        except exceptions.UnknownConversionError:
-            print(f"Conversion from {posvel.system} to {system} is not defined")
+    assert_conversions(posvel, position.PosVelArray.systems.keys())
 
 
 @pytest.mark.parametrize("posveldelta", (posveldelta_trs_a, posveldelta_trs_s), indirect=True)
 def test_posveldelta_conversions(posveldelta):
-    systems = position.PosVelDeltaArray.systems.keys()
-
-    print(f"Testing systems {systems}")
-    for system in systems:
-        try:
-            converted_pos = getattr(getattr(posveldelta, system), posveldelta.system)
-            assert np.allclose(np.asarray(posveldelta), np.asarray(converted_pos))
-            print(f"posveldelta.{system} == posveldelta.{system}.{posveldelta.system} OK")
-        except exceptions.UnknownConversionError:
-            print(f"Conversion from {posveldelta.system} to {system} is not defined")
+    assert_conversions(posveldelta, position.PosVelDeltaArray.systems.keys())
 
 
 def test_slice_and_columns():
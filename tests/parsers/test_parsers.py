@@ -9,6 +9,7 @@ Note: pytest can be started with commando:
 
 # Standard library imports
 from datetime import datetime
+import gzip
 import pathlib
 
 # Third party imports
@@ -35,6 +36,16 @@ def tmpfile(tmpdir):
     return file_path
 
 
+@pytest.fixture
+def terrapos_lines():
+    """Header lines and data lines of the Terrapos position example file"""
+    example_path = pathlib.Path(__file__).parent / "example_files" / "terrapos_position"
+    lines = example_path.read_text().splitlines(keepends=True)
+    header = [line for line in lines if line.startswith("#")]
+    data = [line for line in lines if not line.startswith("#")]
+    return header, data
+
+
 #
 # Tests
 #
@@ -43,6 +54,31 @@ def test_list_of_parsers():
     assert len(parsers.names()) > 0
 
 
+def test_parse_files():
+    """Test that parsing several files gives one parser per file"""
+    example_path = pathlib.Path(__file__).parent / "example_files" / "terrapos_position"
+    parser_list = list(parsers.parse_files("terrapos_position", [example_path, example_path], prefetch=1))
+
+    assert len(parser_list) == 2
+    assert all(np.array_equal(p.data["lat"], parser_list[0].data["lat"]) for p in parser_list)
+
+
+def test_parse_files_parallel(tmp_path, terrapos_lines):
+    """Test that parsing several files in parallel gives the same results in the same order as parsing sequentially"""
+    header, data_lines = terrapos_lines
+    file_paths = list()
+    for num_obs in range(1, 7):
+        file_path = tmp_path / f"terrapos_position_{num_obs}"
+        file_path.write_text("".join(header + data_lines[:num_obs]))
+        file_paths.append(file_path)
+
+    parser_list = list(parsers.parse_files("terrapos_position", file_paths, workers=2))
+
+    assert [len(p.data["lat"]) for p in parser_list] == list(range(1, 7))
+    for parser, file_path in zip(parser_list, file_paths):
+        assert np.array_equal(parser.data["lat"], get_parser("terrapos_position", file_path).data["lat"])
+
+
 # def test_calling_parser(tmpfile):
 #     """Test that calling a parser returns a parser instance"""
 #     parser_name = parsers.names()[0]
@@ -367,6 +403,82 @@ def test_parser_terrapos_position():
     assert 1972 in parser["gpsweek"]
 
 
+def test_parser_terrapos_position_drop_empty_fields():
+    """Test that empty fields are not added to the dataset of terrapos_position if requested"""
+    example_path = pathlib.Path(__file__).parent / "example_files" / "terrapos_position"
+    dset = parsers.parse_file("terrapos_position", example_path, drop_empty_fields=True).as_dataset()
+
+    assert "roll" in dset.meta["empty_fields"]
+    assert "roll" not in dset.fields
+    assert "pdop" in dset.fields
+
+
+def _write_terrapos_variant(file_path, header, data):
+    """Write lines of the Terrapos example file to file_path, gzipped if the suffix is .gz"""
+    text = "".join(header + data)
+    if file_path.suffix == ".gz":
+        file_path.write_bytes(gzip.compress(text.encode()))
+    else:
+        file_path.write_bytes(text.encode())
+
+
+@pytest.mark.parametrize(
+    "file_name, variant, num_obs, nan_fields",
+    [
+        ("crlf", lambda header, data: ([line.replace("\n", "\r\n") for line in header + data], []), 16, ()),
+        (
+            "stripped",
+            lambda header, data: (header, [line[:155].rstrip() + "\n" for line in data]),
+            16,
+            ("reliability_north", "reliability_east", "reliability_height"),
+        ),
+        ("comments", lambda header, data: (header, data[:8] + ["# Comment among data\n"] + data[8:]), 16, ()),
+        ("gzipped.gz", lambda header, data: (header, data), 16, ()),
+        ("no_final_newline", lambda header, data: (header, data[:-1] + [data[-1].rstrip("\n")]), 16, ()),
+        (
+            "invalid",
+            lambda header, data: (header, [line[:20] + "   70.0832x4333" + line[35:] for line in data]),
+            16,
+            ("lat",),
+        ),
+        ("header_only", lambda header, data: (header, []), 0, ()),
+        ("empty", lambda header, data: ([], []), 0, ()),
+    ],
+)
+def test_parser_terrapos_position_variants(tmp_path, terrapos_lines, file_name, variant, num_obs, nan_fields):
+    """Test that variants of the Terrapos example file give the same data as the example file and np.genfromtxt"""
+    file_path = tmp_path / file_name
+    _write_terrapos_variant(file_path, *variant(*terrapos_lines))
+
+    expected = get_parser("terrapos_position").data
+    parser = get_parser("terrapos_position", file_path)
+
+    assert parser.data_available == (num_obs > 0)
+    for name, values in expected.items():
+        values = np.full(num_obs, np.nan) if name in nan_fields else values[:num_obs]
+        assert np.array_equal(parser.data[name], values, equal_nan=True), name
+
+    # Same result as the original np.genfromtxt parser, where invalid values are read as NaN
+    if num_obs > 0:
+        baseline = np.genfromtxt(file_path, **parser.setup_parser())
+        for name in baseline.dtype.names:
+            assert np.array_equal(parser.data[name], baseline[name], equal_nan=True), name
+
+
+@pytest.mark.parametrize("error", [OSError, ValueError])
+def test_parser_terrapos_position_without_mmap(monkeypatch, error):
+    """Test that terrapos_position files that can not be memory mapped are read line by line"""
+    def mmap_error(*args, **kwargs):
+        raise error("memory mapping not supported")
+
+    expected = get_parser("terrapos_position").data
+    monkeypatch.setattr("mmap.mmap", mmap_error)
+    parser = get_parser("terrapos_position")
+
+    for name, values in expected.items():
+        assert np.array_equal(parser.data[name], values, equal_nan=True), name
+
+
 def test_parser_terrapos_residual():
     """Test that parsing terrapos_residual gives expected output"""
     parser = get_parser("terrapos_residual").as_dict()